@@ -6,13 +6,28 @@ Usage:
 """
 
 import json
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Optional
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import verifiers as vf
 from datasets import Dataset
 from verifiers import State
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+
+    def _dumps(obj: Any) -> str:
+        # Match orjson's compact, non-ASCII-escaping output
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
 # =============================================================================
 # Synthetic Transport (replaces real MCP connection)
 # =============================================================================
@@ -37,8 +52,9 @@ class SyntheticTransport:
         data: Optional[dict] = None,
     ):
         self._tools = tools
-        self.handlers = handlers
         self.data = data if data is not None else {}
+        # Bind the backing data once so dispatch is a single lookup and call
+        self.handlers = {name: partial(fn, self.data) for name, fn in handlers.items()}
         self._connected = False
 
     @property
@@ -50,10 +66,10 @@ class SyntheticTransport:
         return self._tools
 
     async def call_tool(self, tool_name: str, arguments: dict) -> str:
-        if tool_name not in self.handlers:
+        handler = self.handlers.get(tool_name)
+        if handler is None:
             raise ValueError(f"No handler for tool: {tool_name}")
-        result = self.handlers[tool_name](self.data, arguments)
-        return str(result)
+        return str(handler(arguments))
 
     async def disconnect(self) -> None:
         self._connected = False
@@ -73,6 +89,18 @@ class SyntheticAirtable:
     def __init__(self):
         self.data: Dict[str, list] = {}
         self._id_counter = 0
+        # Search indices per table: lowercased field values for each record and
+        # trigram -> indices of the records containing it
+        self._lower_values: Dict[str, List[Dict[str, str]]] = {}
+        self._trigrams: Dict[str, Dict[str, Set[int]]] = {}
+        # Each table's records serialized one by one, for assembling list_records pages
+        self._json_recs: Dict[str, List[str]] = {}
+        # Record id -> record per table, for get_record
+        self._by_id: Dict[str, Dict[str, dict]] = {}
+        # Serialized full-table count_records and list_records responses keyed by
+        # (op, table), primed by add_table. Responses to model-chosen queries and ids
+        # are not cached
+        self._cache: Dict[Tuple[str, str], str] = {}
 
     def add_table(self, name: str, records: list):
         for record in records:
@@ -80,6 +108,41 @@ class SyntheticAirtable:
                 self._id_counter += 1
                 record["id"] = f"rec{self._id_counter}"
         self.data[name] = records
+        # Reversed so a duplicated id resolves to its first record, as a scan would
+        self._by_id[name] = {rec["id"]: rec for rec in reversed(records)}
+        self._json_recs[name] = [_dumps(rec) for rec in records]
+
+        lower_values = [{k: str(v).lower() for k, v in rec.items()} for rec in records]
+        trigrams: Dict[str, Set[int]] = defaultdict(set)
+        for idx, values in enumerate(lower_values):
+            for value in values.values():
+                for i in range(len(value) - 2):
+                    trigrams[value[i : i + 3]].add(idx)
+        self._lower_values[name] = lower_values
+        self._trigrams[name] = dict(trigrams)
+
+        # Replaces any responses cached for a previous table of this name
+        self._cache[("count_records", name)] = _dumps({"count": len(records)})
+        self._cache[("list_records", name)] = self._list_response(name, None)
+
+    def _list_response(self, table: str, max_recs: Optional[int]) -> str:
+        fragments = self._json_recs[table]
+        body = ",".join(fragments[:max_recs] if max_recs else fragments)
+        return f'{{"records":[{body}],"total":{len(fragments)}}}'
+
+    def _search_candidates(self, table: str, query: str) -> List[int]:
+        """Indices of records that could contain the query, in table order.
+
+        The query must be at least one trigram long.
+        """
+        postings = self._trigrams[table]
+        candidates: Optional[Set[int]] = None
+        for i in range(len(query) - 2):
+            matches = postings.get(query[i : i + 3], set())
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        return sorted(candidates)
 
     def get_tools(self) -> Dict[str, Tool]:
         return {
@@ -156,41 +219,55 @@ class SyntheticAirtable:
             table = args.get("table_name")
             max_recs = args.get("max_records")
             if table not in data:
-                return json.dumps({"error": f"Table '{table}' not found"})
-            records = data[table][:max_recs] if max_recs else data[table]
-            return json.dumps({"records": records, "total": len(data[table])})
+                return _dumps({"error": f"Table '{table}' not found"})
+
+            if max_recs:
+                return self._list_response(table, max_recs)
+            return self._cache[("list_records", table)]
 
         def search_records(data, args):
             table = args.get("table_name")
             query = args.get("query", "").lower()
             field = args.get("field")
             if table not in data:
-                return json.dumps({"error": f"Table '{table}' not found"})
+                return _dumps({"error": f"Table '{table}' not found"})
+
+            # Trigram postings narrow the scan; survivors get the substring check.
+            # Queries too short to index walk the lowercase mirror in lockstep
+            lower_values = self._lower_values[table]
+            if len(query) < 3:
+                candidates = zip(lower_values, data[table])
+            else:
+                candidates = (
+                    (lower_values[idx], data[table][idx])
+                    for idx in self._search_candidates(table, query)
+                )
             results = []
-            for rec in data[table]:
+            for values, record in candidates:
                 if field:
-                    if query in str(rec.get(field, "")).lower():
-                        results.append(rec)
+                    if query in values.get(field, ""):
+                        results.append(record)
                 else:
-                    if any(query in str(v).lower() for v in rec.values()):
-                        results.append(rec)
-            return json.dumps({"records": results, "count": len(results)})
+                    if any(query in v for v in values.values()):
+                        results.append(record)
+            return _dumps({"records": results, "count": len(results)})
 
         def count_records(data, args):
             table = args.get("table_name")
             if table not in data:
-                return json.dumps({"error": f"Table '{table}' not found"})
-            return json.dumps({"count": len(data[table])})
+                return _dumps({"error": f"Table '{table}' not found"})
+            return self._cache[("count_records", table)]
 
         def get_record(data, args):
             table = args.get("table_name")
             record_id = args.get("record_id")
             if table not in data:
-                return json.dumps({"error": f"Table '{table}' not found"})
-            for rec in data[table]:
-                if rec.get("id") == record_id:
-                    return json.dumps({"record": rec})
-            return json.dumps({"error": f"Record '{record_id}' not found"})
+                return _dumps({"error": f"Table '{table}' not found"})
+
+            rec = self._by_id.get(table, {}).get(record_id)
+            if rec is None:
+                return _dumps({"error": f"Record '{record_id}' not found"})
+            return _dumps({"record": rec})
 
         return {
             "list_records": list_records,
@@ -205,6 +282,24 @@ class SyntheticAirtable:
 # =============================================================================
 
 
+_JSON_TYPE_MAP: Dict[str, Any] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+@lru_cache(maxsize=None)
+def _annotations_for(signature: Tuple[Tuple[str, str], ...]) -> Dict[str, Any]:
+    """Map (property name, JSON type) pairs to Python type annotations."""
+    annotations = {name: _JSON_TYPE_MAP.get(ptype, Any) for name, ptype in signature}
+    annotations["return"] = str
+    return annotations
+
+
 class SyntheticToolWrapper:
     """Wraps a synthetic tool to work with verifiers ToolEnv."""
 
@@ -214,29 +309,7 @@ class SyntheticToolWrapper:
         self.__name__ = tool.name
         self.__doc__ = tool.description
         self.__annotations__ = self._build_annotations()
-
-    def _build_annotations(self) -> dict:
-        annotations = {}
-        if self.tool.inputSchema:
-            props = self.tool.inputSchema.get("properties", {})
-            for name, spec in props.items():
-                ptype = spec.get("type", "string")
-                annotations[name] = {
-                    "string": str,
-                    "integer": int,
-                    "number": float,
-                    "boolean": bool,
-                    "array": list,
-                    "object": dict,
-                }.get(ptype, Any)
-        annotations["return"] = str
-        return annotations
-
-    async def __call__(self, **kwargs):
-        return await self.transport.call_tool(self.tool.name, kwargs)
-
-    def to_oai_tool(self) -> dict:
-        return {
+        self._oai_tool = {
             "type": "function",
             "function": {
                 "name": self.__name__,
@@ -246,6 +319,20 @@ class SyntheticToolWrapper:
             },
         }
 
+    def _build_annotations(self) -> dict:
+        props = (self.tool.inputSchema or {}).get("properties", {})
+        signature = tuple(
+            (name, spec.get("type", "string")) for name, spec in props.items()
+        )
+        # Copy so a wrapper's __annotations__ never aliases the cached dict
+        return dict(_annotations_for(signature))
+
+    async def __call__(self, **kwargs):
+        return await self.transport.call_tool(self.tool.name, kwargs)
+
+    def to_oai_tool(self) -> dict:
+        return self._oai_tool
+
 
 # =============================================================================
 # Synthetic MCP Environment
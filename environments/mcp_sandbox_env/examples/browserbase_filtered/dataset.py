@@ -3,23 +3,31 @@
 https://huggingface.co/datasets/osunlp/Online-Mind2Web
 """
 
+from functools import lru_cache
+
 from datasets import load_dataset
 
+COLUMNS = ["confirmed_task", "task_id", "website", "reference_length"]
+BATCH_SIZE = 1000
+
 
+@lru_cache(maxsize=1)
 def load_mind2web_dataset():
-    dataset = load_dataset("osunlp/Online-Mind2Web", split="test")
+    # Stream the split so rows are decoded lazily in a single pass, and only
+    # for the columns the environment actually uses
+    dataset = load_dataset("osunlp/Online-Mind2Web", split="test", streaming=True).select_columns(COLUMNS)
 
     questions = []
     infos = []
 
-    for item in dataset:
-        questions.append(item["confirmed_task"])
-        infos.append(
-            {
-                "task_id": item["task_id"],
-                "website": item["website"],
-                "reference_length": item["reference_length"],
-            }
+    # Pull whole column slices per batch rather than decoding one row dict at a time
+    for batch in dataset.iter(batch_size=BATCH_SIZE):
+        questions.extend(batch["confirmed_task"])
+        infos.extend(
+            {"task_id": task_id, "website": website, "reference_length": reference_length}
+            for task_id, website, reference_length in zip(
+                batch["task_id"], batch["website"], batch["reference_length"]
+            )
         )
 
     return {
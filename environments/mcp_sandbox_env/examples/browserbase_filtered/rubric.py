@@ -7,46 +7,413 @@
 https://tiancixue.notion.site/An-Illusion-of-Progress-Assessing-the-Current-State-of-Web-Agents-1ac6cd2b9aac80719cd6f68374aaf4b4
 """
 
-from typing import Literal
-
+import asyncio
+import base64
+import hashlib
+import io
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Annotated, Literal
+
+import httpx
+import imagehash
+import msgspec
+import openai
+import orjson
 import verifiers as vf
 from openai import AsyncOpenAI
-from pydantic import BaseModel, Field
+from PIL import Image
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Upper bound on in-flight judge requests across all concurrent rollouts to avoid rate-limit spikes
+MAX_CONCURRENT_JUDGE_CALLS = 10
+
+# One semaphore per event loop, since asyncio primitives are bound to the loop that first waits on them
+_JUDGE_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Consecutive failed judge calls before failing fast, and how long to stay open before retrying
+JUDGE_BREAKER_MAX_FAILURES = 5
+JUDGE_BREAKER_RESET_SECONDS = 60.0
+
+# Seconds between status checks while waiting on an offline Batch API job
+BATCH_POLL_INTERVAL = 30
+
+# How many parsed key point and screenshot relevance judgments to keep for reuse across rollouts
+JUDGE_CACHE_SIZE = 4096
+
+# Identified key points keyed by (judge model, Mind2Web task_id), reused by every rollout of the same task
+_KEY_POINTS_CACHE: dict[tuple[str, str], list[str]] = {}
+
+# Screenshots are downscaled to fit this box and re-encoded as JPEG before judging
+SCREENSHOT_MAX_SIZE = (768, 768)
+SCREENSHOT_JPEG_QUALITY = 80
+
+# Consecutive screenshots whose perceptual hashes differ by at most this many of the
+# SCREENSHOT_HASH_SIZE**2 bits are treated as duplicates. This only catches essentially
+# unchanged pages: a single edited field can be closer than cursor or spinner noise, so
+# anything looser would start merging screenshots that carry evidence
+SCREENSHOT_HASH_SIZE = 16
+SCREENSHOT_DEDUP_DISTANCE = 4
+
+# How many prepared screenshots to keep around for rollouts that share them
+SCREENSHOT_CACHE_SIZE = 256
+
+# Tool output beyond this many characters is cut from the stage-3 transcript
+STEP3_TOOL_OUTPUT_CHARS = 2048
+
+STEP3_INSTRUCTIONS = """**Instructions:**
+- Review the agent's tool calls and their results in the conversation below
+- Determine whether ALL key points were accomplished based on the actions and screenshots
+- Be strict: partial completion = failure
+- Only mark as success if there is clear evidence that all key points were completed"""
 
+# Matches the leading success field of a streamed OutcomeJudgment
+_SUCCESS_PATTERN = re.compile(r'"success"\s*:\s*(true|false)')
 
-class KeyPointsIdentification(BaseModel):
-    key_points: list[str] = Field(
-        description="3-5 specific key points that must be accomplished for successful task completion"
+
+class KeyPointsIdentification(msgspec.Struct):
+    key_points: Annotated[
+        list[str],
+        msgspec.Meta(description="3-5 specific key points that must be accomplished for successful task completion"),
+    ]
+
+
+class ScreenshotRelevance(msgspec.Struct):
+    relevance_score: Annotated[
+        Literal[1, 2, 3, 4, 5],
+        msgspec.Meta(
+            description="Relevance score: 5=highly relevant (critical steps), 4=very relevant, 3=moderately relevant, 2=slightly relevant, 1=not relevant"
+        ),
+    ]
+    reason: Annotated[str, msgspec.Meta(description="Brief explanation for the relevance score")]
+
+
+class OutcomeJudgment(msgspec.Struct):
+    # success must stay the first field so it can be read off the front of a streamed response
+    success: Annotated[bool, msgspec.Meta(description="True if task was fully completed, False otherwise")]
+    analysis: Annotated[str, msgspec.Meta(description="Detailed reasoning for the judgment")]
+    completed_key_points: Annotated[
+        list[str], msgspec.Meta(description="List of key points that were successfully completed")
+    ]
+    missing_key_points: Annotated[list[str], msgspec.Meta(description="List of key points that were not completed")]
+
+
+class _LRUCache:
+    """Mapping bounded to maxsize entries that evicts the least recently used one.
+
+    Guarded by a lock as it is also used from worker threads.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Parsed judge outputs keyed by a content hash of their inputs, shared across rollouts
+_JUDGE_CACHE = _LRUCache(JUDGE_CACHE_SIZE)
+
+# Downscaled base64 JPEG and perceptual hash keyed by a hash of the original base64 screenshot
+_PREPARED_SCREENSHOTS = _LRUCache(SCREENSHOT_CACHE_SIZE)
+
+
+def _judge_semaphore() -> asyncio.Semaphore:
+    """Judge concurrency bound shared by every rollout on the running loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _JUDGE_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _JUDGE_SEMAPHORES[loop] = asyncio.Semaphore(MAX_CONCURRENT_JUDGE_CALLS)
+    return semaphore
+
+
+def _sha256(data: str | bytes) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _prepare_screenshot(data: str) -> tuple[str, imagehash.ImageHash]:
+    """Shrink a base64 screenshot to SCREENSHOT_MAX_SIZE, re-encode it as base64 JPEG and perceptually hash it."""
+    key = _sha256(data)
+    prepared = _PREPARED_SCREENSHOTS.get(key)
+    if prepared is None:
+        image = Image.open(io.BytesIO(base64.b64decode(data)))
+        image.thumbnail(SCREENSHOT_MAX_SIZE, Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=SCREENSHOT_JPEG_QUALITY)
+        prepared = (base64.b64encode(buffer.getvalue()).decode("ascii"), imagehash.phash(image, hash_size=SCREENSHOT_HASH_SIZE))
+        _PREPARED_SCREENSHOTS.put(key, prepared)
+    return prepared
+
+
+def extract_screenshots_for_vision(completion, state=None):
+    if state is not None and "_screenshots" in state:
+        return state["_screenshots"]
+
+    parts = (
+        part
+        for msg in completion
+        if msg.get("role") == "tool"
+        for part in (msg.get("content") or ())
+        if type(part) is dict and part.get("type") == "image" and "data" in part
     )
 
+    # Collapse runs of back-to-back near-identical screenshots (no-op scrolls, re-shoots after
+    # waits) into one, keeping the latest of each run. A page revisited later starts a new run
+    screenshots: list[dict] = []
+    run_hash: imagehash.ImageHash | None = None
+    for part in parts:
+        data, phash = _prepare_screenshot(part["data"])
+        # Copy so the recorded rollout keeps its original screenshot
+        screenshot = {
+            **part,
+            "data": data,
+            "mimeType": "image/jpeg",
+            "cluster_count": 1,
+            # Built once here and shared by every judge request that includes this screenshot
+            "_data_url": f"data:image/jpeg;base64,{data}",
+        }
+        # Compare against the run's first screenshot so small changes can't add up across a run
+        if run_hash is not None and phash - run_hash <= SCREENSHOT_DEDUP_DISTANCE:
+            screenshot["cluster_count"] += screenshots[-1]["cluster_count"]
+            screenshots[-1] = screenshot
+        else:
+            screenshots.append(screenshot)
+            run_hash = phash
+
+    if state is not None:
+        state["_screenshots"] = screenshots
+    return screenshots
+
+
+def _count_actions(completion) -> int:
+    return sum(len(msg.get("tool_calls") or ()) for msg in completion if msg.get("role") == "assistant")
+
 
-class ScreenshotRelevance(BaseModel):
-    relevance_score: Literal[1, 2, 3, 4, 5] = Field(
-        description="Relevance score: 5=highly relevant (critical steps), 4=very relevant, 3=moderately relevant, 2=slightly relevant, 1=not relevant"
+def _summarize_tool_message(msg: dict) -> dict:
+    """Replace screenshots in a tool message with placeholders and truncate its text output.
+
+    Stage 3 receives the curated key screenshots separately, so the inline images only add prefill tokens.
+    """
+    content = msg.get("content")
+    if msg.get("role") != "tool" or not content:
+        return msg
+    if isinstance(content, str):
+        return {**msg, "content": content[:STEP3_TOOL_OUTPUT_CHARS]}
+
+    parts = []
+    for part in content:
+        if type(part) is dict and part.get("type") == "image":
+            parts.append({"type": "text", "text": "[screenshot omitted]"})
+        elif type(part) is dict and part.get("type") == "text":
+            parts.append({**part, "text": part.get("text", "")[:STEP3_TOOL_OUTPUT_CHARS]})
+        else:
+            parts.append(part)
+    return {**msg, "content": parts}
+
+
+@lru_cache(maxsize=None)
+def _response_format(model: type[msgspec.Struct]) -> dict:
+    """Build a strict json_schema response format for a response struct, once per model."""
+    # The top-level schema is a $ref, so inline the struct's own component as the root object
+    _, components = msgspec.json.schema_components([model])
+    schema = components[model.__name__]
+    schema["additionalProperties"] = False
+    return {"type": "json_schema", "json_schema": {"name": model.__name__, "schema": schema, "strict": True}}
+
+
+async def _batch_parse(
+    judge_client: AsyncOpenAI, judge_model: str, requests: dict[str, list], response_format: type[msgspec.Struct]
+) -> dict[str, msgspec.Struct]:
+    """Run chat completion requests through the OpenAI Batch API and parse each result."""
+    lines = [
+        orjson.dumps(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": judge_model,
+                    "messages": messages,
+                    "response_format": _response_format(response_format),
+                    "temperature": 0.0,
+                },
+            }
+        )
+        for custom_id, messages in requests.items()
+    ]
+    batch_file = await judge_client.files.create(
+        file=("requests.jsonl", b"\n".join(lines)), purpose="batch"
     )
-    reason: str = Field(description="Brief explanation for the relevance score")
+    batch = None
+    try:
+        batch = await judge_client.batches.create(
+            input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
 
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+            batch = await judge_client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or batch.output_file_id is None:
+            raise RuntimeError(f"Judge batch {batch.id} finished with status '{batch.status}'")
+
+        output_text = (await judge_client.files.content(batch.output_file_id)).text
+    finally:
+        # Don't leave the request, output and error files behind in the account
+        file_ids = [batch_file.id]
+        if batch is not None:
+            file_ids += [file_id for file_id in (batch.output_file_id, batch.error_file_id) if file_id]
+        await asyncio.gather(*[judge_client.files.delete(file_id) for file_id in file_ids], return_exceptions=True)
+
+    results = {}
+    for line in output_text.splitlines():
+        row = orjson.loads(line)
+        custom_id = row["custom_id"]
+        response = row.get("response") or {}
+        if row.get("error") or response.get("status_code") != 200:
+            error = row.get("error") or (response.get("body") or {}).get("error")
+            raise RuntimeError(
+                f"Judge batch {batch.id} request {custom_id} failed with status {response.get('status_code')}: {error}"
+            )
+        choices = response["body"].get("choices") or ()
+        if not choices:
+            raise RuntimeError(f"Judge batch {batch.id} request {custom_id} returned no choices")
+        if choices[0].get("finish_reason") == "length":
+            raise RuntimeError(f"Judge batch {batch.id} request {custom_id} was truncated at the token limit")
+        results[custom_id] = msgspec.json.decode(choices[0]["message"]["content"], type=response_format)
+
+    missing = set(requests) - set(results)
+    if missing:
+        raise RuntimeError(f"Judge batch {batch.id} returned no result for: {sorted(missing)}")
+    return results
+
+
+async def _stream_success(judge_client: AsyncOpenAI, judge_model: str, messages: list) -> OutcomeJudgment:
+    """Stream an outcome judgment and stop as soon as its success field has been emitted."""
+    stream = await judge_client.chat.completions.create(
+        model=judge_model,
+        messages=messages,
+        response_format=_response_format(OutcomeJudgment),
+        temperature=0.0,
+        stream=True,
+    )
+    content = ""
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                content += chunk.choices[0].delta.content
+                match = _SUCCESS_PATTERN.search(content)
+                if match:
+                    return OutcomeJudgment(
+                        success=match.group(1) == "true", analysis="", completed_key_points=[], missing_key_points=[]
+                    )
+    finally:
+        await stream.close()
+    return msgspec.json.decode(content, type=OutcomeJudgment)
 
-class OutcomeJudgment(BaseModel):
-    success: bool = Field(description="True if task was fully completed, False otherwise")
-    analysis: str = Field(description="Detailed reasoning for the judgment")
-    completed_key_points: list[str] = Field(description="List of key points that were successfully completed")
-    missing_key_points: list[str] = Field(description="List of key points that were not completed")
 
+# Judge failures that signal an unhealthy endpoint: rate limits, 5xx, dropped connections and timeouts
+_TRANSIENT_JUDGE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
 
-def extract_screenshots_for_vision(completion):
-    screenshots = []
 
-    print(f"Completion: {completion}")
+class _CircuitBreaker:
+    """Fail fast once the judge endpoint keeps failing instead of queueing more calls against it.
 
-    for msg in completion:
-        if msg.get("role") == "tool":
-            content = msg.get("content", [])
-            for part in content:
-                if isinstance(part, dict) and part.get("type") == "image" and "data" in part:
-                    screenshots.append(part)
+    Only transient errors count as failures. Any other response, including a rejected request,
+    shows the endpoint is up and resets the count.
+    """
 
-    return screenshots
+    def __init__(self, max_failures: int, reset_seconds: float):
+        self.max_failures = max_failures
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    async def call(self, func, *args, **kwargs):
+        trial = False
+        if self._opened_at is not None:
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_seconds:
+                raise RuntimeError(f"Judge circuit breaker open after {self._failures} consecutive failures")
+            # Half-open: this call is the single trial, everyone else keeps failing fast until it settles
+            self._trial_in_flight = trial = True
+
+        try:
+            result = await func(*args, **kwargs)
+        except _TRANSIENT_JUDGE_ERRORS:
+            self._failures += 1
+            if trial or self._failures >= self.max_failures:
+                self._opened_at = time.monotonic()
+            raise
+        except Exception:
+            self._close()
+            raise
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+        self._close()
+        return result
+
+    def _close(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+
+_JUDGE_BREAKER = _CircuitBreaker(JUDGE_BREAKER_MAX_FAILURES, JUDGE_BREAKER_RESET_SECONDS)
+
+# Retry transient judge failures with jittered backoff
+_judge_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(min=1, max=30),
+    retry=retry_if_exception_type(_TRANSIENT_JUDGE_ERRORS),
+    reraise=True,
+)
+
+
+async def _call_judge(func, *args, **kwargs):
+    """Call a judge endpoint with retries, behind the shared circuit breaker."""
+
+    # The SDK's create methods return a coroutine without being coroutine functions themselves
+    # (they are wrapped by required_args), so tenacity would treat them as sync and retry nothing.
+    # Retrying an async wrapper keeps every attempt inside the retry loop
+    @_judge_retry
+    async def attempt():
+        return await func(*args, **kwargs)
+
+    return await _JUDGE_BREAKER.call(attempt)
+
+
+@lru_cache(maxsize=1)
+def _judge_client() -> AsyncOpenAI:
+    """Shared judge client so keep-alive connections are reused across rubric instances."""
+    return AsyncOpenAI(
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+    )
 
 
 def get_rubric() -> vf.Rubric:
@@ -57,23 +424,77 @@ def get_rubric() -> vf.Rubric:
     2. Screenshot Relevance Scoring (vision + structured outputs)
     3. Outcome Judgment (vision + text + structured outputs)
 
+    Set ``state["offline_eval"]`` to route the judge calls through the OpenAI Batch API
+    (half the cost, no rate-limit tail latency) instead of the online endpoint. Online, the
+    outcome judgment is streamed and cut off once ``success`` is known; set ``state["debug"]``
+    to also generate its analysis and key point breakdown.
+
     Note: Requires a vision-capable model (gpt-4o-mini or better) for screenshot evaluation.
     """
     rubric = vf.Rubric()
     rubric.class_objects = {
         "parser": rubric.parser,
-        "judge_client": AsyncOpenAI(),
+        "judge_client": _judge_client(),
         "judge_model": "gpt-4o-mini",
     }
 
     async def task_success_reward(judge_client, judge_model, prompt, completion, answer, state):
-        print(f"Completion TASK SUCCESS REWARD: {completion}")
-
         # Use cached results if available (to avoid redundant LLM calls)
         if "mind2web_evaluation" in state:
             return state["mind2web_evaluation"]["success_score"]
 
-        screenshots = extract_screenshots_for_vision(completion)
+        # Decoding, resizing and hashing screenshots is CPU-bound, so keep it off the event loop
+        screenshots = await asyncio.to_thread(extract_screenshots_for_vision, completion, state)
+        state["_action_count"] = _count_actions(completion)
+        info = state.get("info", {})
+        task_id = info.get("task_id", "task")
+        offline = state.get("offline_eval", False)
+        # Retries are handled by _call_judge, so keep the SDK from retrying underneath it
+        online_client = judge_client.with_options(max_retries=0)
+
+        async def judge(requests, response_format, cache_keys=None, call=None):
+            """Parse a judgment for each request, via the Batch API when evaluating offline.
+
+            With ``cache_keys``, results are cached under ``cache_keys[custom_id]`` so identical inputs are
+            never judged twice. ``call`` optionally replaces the online structured-output parse for a single request.
+            """
+            results = {}
+            if cache_keys is not None:
+                for cid in requests:
+                    cached = _JUDGE_CACHE.get(cache_keys[cid])
+                    if cached is not None:
+                        results[cid] = cached
+            pending = {cid: messages for cid, messages in requests.items() if cid not in results}
+            if not pending:
+                return results
+
+            async def parse(messages):
+                async with _judge_semaphore():
+                    response = await _call_judge(
+                        online_client.chat.completions.create,
+                        model=judge_model,
+                        messages=messages,
+                        response_format=_response_format(response_format),
+                        temperature=0.0,
+                    )
+                # Structure is enforced server-side by the strict schema, so validate the JSON directly
+                return msgspec.json.decode(response.choices[0].message.content, type=response_format)
+
+            async def limited(messages):
+                async with _judge_semaphore():
+                    return await _call_judge(call, online_client, judge_model, messages)
+
+            if offline:
+                fetched = await _batch_parse(judge_client, judge_model, pending, response_format)
+            else:
+                fetch = parse if call is None else limited
+                fetched = dict(zip(pending, await asyncio.gather(*[fetch(messages) for messages in pending.values()])))
+
+            if cache_keys is not None:
+                for cid, result in fetched.items():
+                    _JUDGE_CACHE.put(cache_keys[cid], result)
+            results.update(fetched)
+            return results
 
         # Get task description from prompt (last user message)
         task_description = prompt[-1]["content"] if isinstance(prompt, list) else str(prompt)
@@ -85,22 +506,25 @@ Task: {task_description}
 
 List 3-5 key points that are critical for completing this task. Be specific and concrete."""
 
-        step1_response = await judge_client.beta.chat.completions.parse(
-            model=judge_model,
-            messages=[{"role": "user", "content": step1_prompt}],
-            response_format=KeyPointsIdentification,
-            temperature=0.0,
-        )
-        step1_result = step1_response.choices[0].message.parsed
-        key_points = step1_result.key_points
+        key_points = _KEY_POINTS_CACHE.get((judge_model, task_id))
+        if key_points is None:
+            # Key points depend only on the task description
+            step1_id = f"{task_id}-step1"
+            step1_results = await judge(
+                {step1_id: [{"role": "user", "content": step1_prompt}]},
+                KeyPointsIdentification,
+                {step1_id: f"{judge_model}:step1:{_sha256(task_description)}"},
+            )
+            key_points = step1_results[step1_id].key_points
+            if "task_id" in info:
+                _KEY_POINTS_CACHE[judge_model, task_id] = key_points
 
         # Step 2: Screenshot Relevance Scoring
+        # Relevance is judged against the key points, as in Online-Mind2Web, so it waits for step 1
         key_screenshots = []
         screenshot_threshold = 3
 
-        if screenshots:
-            for i, screenshot in enumerate(screenshots[:10]):  # Limit to first 10 screenshots to avoid token overflow
-                step2_text = f"""Given this web navigation task and a screenshot, rate how relevant this screenshot is to evaluating task completion.
+        step2_text = f"""Given this web navigation task and a screenshot, rate how relevant this screenshot is to evaluating task completion.
 
 Task: {task_description}
 Key Points: {", ".join(key_points)}
@@ -112,60 +536,73 @@ Rate the relevance on a scale of 1-5 where:
 - 2 = Slightly relevant
 - 1 = Not relevant"""
 
-                message_content = [{"type": "text", "text": step2_text}]
-
-                message_content.append(
+        step2_requests = {}
+        step2_cache_keys = {}
+        step2_text_hash = _sha256(step2_text)
+        for i, screenshot in enumerate(screenshots[:10]):  # Limit to first 10 screenshots to avoid token overflow
+            message_content = [{"type": "text", "text": step2_text}]
+
+            # Relevance only needs the gist of the page, so low detail is enough here
+            message_content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": screenshot["_data_url"],
+                        "detail": "low",
+                    },
+                }
+            )
+            custom_id = f"{task_id}-step2-{i}"
+            step2_requests[custom_id] = [{"role": "user", "content": message_content}]
+            # Relevance depends only on the step 2 prompt and the image bytes
+            image_hash = _sha256(base64.b64decode(screenshot["data"]))
+            step2_cache_keys[custom_id] = f"{judge_model}:step2:{step2_text_hash}:{image_hash}"
+
+        # All screenshot scores are judged concurrently (or in one batch when offline)
+        step2_results = await judge(step2_requests, ScreenshotRelevance, step2_cache_keys)
+
+        for i, (custom_id, screenshot) in enumerate(zip(step2_requests, screenshots)):
+            step2_result = step2_results[custom_id]
+            relevance_score = step2_result.relevance_score
+
+            if relevance_score >= screenshot_threshold:
+                key_screenshots.append(
                     {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:{screenshot.get('mimeType', 'image/png')};base64,{screenshot['data']}"
-                        },
+                        "index": i,
+                        "screenshot": screenshot,
+                        "relevance": relevance_score,
+                        "reason": step2_result.reason,
                     }
                 )
 
-                step2_response = await judge_client.beta.chat.completions.parse(
-                    model=judge_model,
-                    messages=[{"role": "user", "content": message_content}],
-                    response_format=ScreenshotRelevance,
-                    temperature=0.0,
-                )
-                step2_result = step2_response.choices[0].message.parsed
-                relevance_score = step2_result.relevance_score
-
-                if relevance_score >= screenshot_threshold:
-                    key_screenshots.append(
-                        {
-                            "index": i,
-                            "screenshot": screenshot,
-                            "relevance": relevance_score,
-                            "reason": step2_result.reason,
-                        }
-                    )
-
         # Step 3: Outcome Judgment
         # Use key points + key screenshots + raw action history (tool calls) for final decision
+        key_points_text = "\n".join(f"{i}. {kp}" for i, kp in enumerate(key_points, 1))
+        if key_screenshots:
+            screenshots_text = "\n".join(
+                f"- Screenshot {s['index'] + 1} (relevance: {s['relevance']}/5): {s['reason']}" for s in key_screenshots
+            )
+        else:
+            screenshots_text = "No key screenshots identified"
+
         step3_system = f"""You are evaluating whether a web navigation task was successfully completed.
 
 **Task Description:**
 {task_description}
 
 **Key Points Required for Success:**
-{chr(10).join(f"{i + 1}. {kp}" for i, kp in enumerate(key_points))}
+{key_points_text}
 
 **Key Screenshots Identified ({len(key_screenshots)} relevant screenshots):**
-{chr(10).join(f"- Screenshot {s['index'] + 1} (relevance: {s['relevance']}/5): {s['reason']}" for s in key_screenshots) if key_screenshots else "No key screenshots identified"}
+{screenshots_text}
 
-**Instructions:**
-- Review the agent's tool calls and their results in the conversation below
-- Determine whether ALL key points were accomplished based on the actions and screenshots
-- Be strict: partial completion = failure
-- Only mark as success if there is clear evidence that all key points were completed"""
+{STEP3_INSTRUCTIONS}"""
 
         step3_messages = [
             {"role": "system", "content": step3_system},
         ]
         step3_messages.extend(prompt)
-        step3_messages.extend(completion)
+        step3_messages.extend(_summarize_tool_message(msg) for msg in completion)
 
         if key_screenshots:
             screenshot_content = [{"type": "text", "text": "Here are the key screenshots for your evaluation:"}]
@@ -177,7 +614,8 @@ Rate the relevance on a scale of 1-5 where:
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:{screenshot.get('mimeType', 'image/png')};base64,{screenshot['data']}"
+                                "url": screenshot["_data_url"],
+                                "detail": "high",
                             },
                         }
                     )
@@ -188,13 +626,16 @@ Rate the relevance on a scale of 1-5 where:
             {"role": "user", "content": "Based on the conversation and screenshots above, provide your evaluation."}
         )
 
-        step3_response = await judge_client.beta.chat.completions.parse(
-            model=judge_model,
-            messages=step3_messages,
-            response_format=OutcomeJudgment,
-            temperature=0.0,
+        # Only the success flag feeds the reward, so skip decoding the verbose fields unless debugging
+        verbose = offline or state.get("debug", False)
+        # Not cached: the transcript makes every outcome judgment unique
+        step3_id = f"{task_id}-step3"
+        step3_results = await judge(
+            {step3_id: step3_messages},
+            OutcomeJudgment,
+            call=None if verbose else _stream_success,
         )
-        step3_result = step3_response.choices[0].message.parsed
+        step3_result = step3_results[step3_id]
 
         success = step3_result.success
         success_score = 1.0 if success else 0.0
@@ -216,11 +657,9 @@ Rate the relevance on a scale of 1-5 where:
 
     def action_count_metric(prompt, completion, answer, state):
         """Informational metric: Count the number of tool calls made."""
-        count = 0
-        for msg in completion:
-            if msg.get("role") == "assistant" and msg.get("tool_calls"):
-                count += len(msg["tool_calls"])
-        return float(count)
+        if "_action_count" in state:
+            return float(state["_action_count"])
+        return float(_count_actions(completion))
 
     def key_screenshots_metric(prompt, completion, answer, state):
         """Informational metric: Count the number of key screenshots identified (relevance ≥ 3)."""
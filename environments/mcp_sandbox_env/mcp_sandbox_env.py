@@ -1,13 +1,32 @@
 import asyncio
+import hashlib
+import json
+import time
 from typing import Any, Dict, List, Optional
 
+import httpx
 import verifiers as vf
 from datasets import Dataset
 from dotenv import load_dotenv
 from examples import CONFIGS
-from src.mcp_server_connection import MCPServerConnection
+from src.mcp_server_connection import DEFAULT_MAX_IN_FLIGHT, MCPServerConnection
 from src.mcp_tool_wrapper import MCPToolWrapper
 
+# Upper bound on how long to wait for an exposed URL's TLS cert to be issued
+CERT_WAIT_TIMEOUT = 180.0
+CERT_PROBE_MAX_BACKOFF = 2.0
+CERT_PROBE_TIMEOUT = 5.0
+
+
+def _server_identity(config: Dict[str, Any]) -> str:
+    """Stable key for an MCP server config, independent of the sandbox it runs in."""
+    identity = {
+        "server_start_cmd": config.get("server_start_cmd", ""),
+        "server_env": config.get("server_env", {}),
+        "allowed_tools": config.get("allowed_tools"),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
 
 class SandboxMCPEnv(vf.SandboxEnv):
     """Sandbox-backed MCP environment with support for multiple MCP servers."""
@@ -19,6 +38,7 @@ class SandboxMCPEnv(vf.SandboxEnv):
         start_command: str = "tail -f /dev/null",
         mcp_server_configs: Optional[List[Dict[str, Any]]] = None,
         max_turns: int = 10,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
         **kwargs: Any,
     ) -> None:
         load_dotenv()
@@ -31,9 +51,20 @@ class SandboxMCPEnv(vf.SandboxEnv):
         )
 
         self.mcp_server_configs = mcp_server_configs or []
+        self.max_in_flight = max_in_flight
         self._server_connections: List[MCPServerConnection] = []
         self._wrapper_tools: List[MCPToolWrapper] = []
         self._exposure_ids: List[str] = []
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client for probing exposed sandbox URLs, shared by every rollout on this env."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=500, max_keepalive_connections=100),
+                timeout=httpx.Timeout(30.0),
+            )
+        return self._http
 
     async def _start_mcp_server(self, sandbox_id: str, config: Dict[str, Any]) -> None:
         """Start a single MCP server"""
@@ -71,12 +102,47 @@ class SandboxMCPEnv(vf.SandboxEnv):
         self.logger.info(f"Port {mcp_port} for '{server_name}' exposed at: {url}")
         return url
 
+    async def _setup_servers(self, sandbox_id: str) -> None:
+        """Run every server's pre-install commands in config order, then start all servers."""
+        # Installs stay sequential: later servers can rely on what earlier ones installed (e.g. git
+        # from an apt-get), and package managers in the shared sandbox must not run concurrently
+        for index, config in enumerate(self.mcp_server_configs):
+            server_name = config.get("name", f"server-{index}")
+            self.logger.info(f"Setting up MCP server {index + 1}/{len(self.mcp_server_configs)}: {server_name}")
+
+            # Run pre-install commands for this server
+            for cmd in config.get("pre_install_cmds", []):
+                response = await self.bash(cmd, sandbox_id)
+                self.logger.info(f"[{server_name}] Pre-install command completed: {response[:100]}")
+
+        # Start the MCP servers
+        await asyncio.gather(*[self._start_mcp_server(sandbox_id, config) for config in self.mcp_server_configs])
+
+    async def _wait_for_cert(self, url: str) -> None:
+        """Probe an exposed URL until its TLS handshake succeeds or CERT_WAIT_TIMEOUT elapses."""
+        deadline = time.monotonic() + CERT_WAIT_TIMEOUT
+        delay = 0.25
+        while True:
+            try:
+                # Any HTTP response, even an error status, means the cert has been issued
+                await self._http_client().head(url, timeout=CERT_PROBE_TIMEOUT)
+                self.logger.info(f"Cert ready for {url}")
+                return
+            except httpx.TransportError as e:
+                if time.monotonic() + delay > deadline:
+                    self.logger.warning(f"Cert for {url} not ready after {CERT_WAIT_TIMEOUT:.0f}s: {e}")
+                    return
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, CERT_PROBE_MAX_BACKOFF)
+
     async def _connect_mcp(self, url: str, config: Dict[str, Any]) -> List[MCPToolWrapper]:
         """Connect to a single MCP server via the exposed port."""
         server_name = config.get("name", "unknown")
         self.logger.info(f"Connecting to MCP server '{server_name}' at {url}")
 
-        connection = MCPServerConnection(url, None, self.logger)
+        connection = MCPServerConnection(
+            url, None, self.logger, cache_key=_server_identity(config), max_in_flight=self.max_in_flight
+        )
         tools = await connection.connect()
 
         # Get tool filter from config
@@ -104,53 +170,31 @@ class SandboxMCPEnv(vf.SandboxEnv):
             return state
 
         # Expose all ports first
-        exposed_urls = []
-        for idx, config in enumerate(self.mcp_server_configs):
-            url = await self._expose_port(sandbox_id, config, idx)
-            exposed_urls.append((url, config))
-
-        # Wait once for cert issuance after all ports are exposed
-        # TODO: remove this once cert issuance stuff is fixed
-        self.logger.info(f"All {len(self.mcp_server_configs)} MCP servers started, waiting 180s for cert issuance...")
-        await asyncio.sleep(180)
-
-        # Process each MCP server config
-        for idx, config in enumerate(self.mcp_server_configs):
-            server_name = config.get("name", f"server-{idx}")
-            self.logger.info(f"Setting up MCP server {idx + 1}/{len(self.mcp_server_configs)}: {server_name}")
-
-            # Run pre-install commands for this server
-            pre_install_cmds = config.get("pre_install_cmds", [])
-            for cmd in pre_install_cmds:
-                response = await self.bash(cmd, sandbox_id)
-                self.logger.info(f"[{server_name}] Pre-install command completed: {response[:100]}")
+        urls = await asyncio.gather(
+            *[self._expose_port(sandbox_id, config, idx) for idx, config in enumerate(self.mcp_server_configs)]
+        )
+        exposed_urls = list(zip(urls, self.mcp_server_configs))
 
-            # Start the MCP server
-            await self._start_mcp_server(sandbox_id, config)
+        # Install and start every server while the certs for the exposed URLs are being issued
+        self.logger.info(f"All {len(self.mcp_server_configs)} MCP server ports exposed, waiting for cert issuance...")
+        await asyncio.gather(
+            *[self._wait_for_cert(url) for url, _ in exposed_urls],
+            self._setup_servers(sandbox_id),
+        )
 
         # Now connect to each server
-        all_wrappers = []
-        for url, config in exposed_urls:
-            wrappers = await self._connect_mcp(url, config)
-            all_wrappers.extend(wrappers)
-
-        self._wrapper_tools = all_wrappers
-
-        # Register all wrappers explicitly to preserve their MCP-provided schemas
-        existing_tools = list(self.tools)
-        existing_oai_tools = list(self.oai_tools or [])
-        existing_tool_map = dict(self.tool_map)
-        for wrapper in self._wrapper_tools:
-            existing_tools.append(wrapper)
-            existing_oai_tools.append(wrapper.to_oai_tool())
-            existing_tool_map[getattr(wrapper, "__name__", wrapper.__class__.__name__)] = wrapper
-        self.tools = existing_tools
-        self.oai_tools = existing_oai_tools
-        self.tool_map = existing_tool_map
+        wrapper_lists = await asyncio.gather(*[self._connect_mcp(url, config) for url, config in exposed_urls])
+        self._wrapper_tools = [wrapper for wrappers in wrapper_lists for wrapper in wrappers]
+
+        # Register all wrappers explicitly to preserve their MCP-provided schemas, in config order
+        # so the tool list (and with it the prompt) is the same every episode
+        tool_names = [getattr(w, "__name__", w.__class__.__name__) for w in self._wrapper_tools]
+        self.tools = list(self.tools) + self._wrapper_tools
+        self.oai_tools = list(self.oai_tools or []) + [w.to_oai_tool() for w in self._wrapper_tools]
+        self.tool_map = {**self.tool_map, **dict(zip(tool_names, self._wrapper_tools))}
         state["info"]["oai_tools"] = self.oai_tools
 
         # Log all registered MCP tools
-        tool_names = [getattr(w, "__name__", w.__class__.__name__) for w in self._wrapper_tools]
         self.logger.info(
             f"Registered {len(self._wrapper_tools)} total MCP tools from {len(self.mcp_server_configs)} servers: {tool_names}"
         )
@@ -163,30 +207,48 @@ class SandboxMCPEnv(vf.SandboxEnv):
             sandbox_id = state["sandbox_id"]
 
             # Disconnect from all MCP servers
-            for connection in self._server_connections:
-                try:
-                    await connection.disconnect()
+            results = await asyncio.gather(
+                *[connection.disconnect() for connection in self._server_connections], return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    self.logger.error(f"Failed to disconnect from MCP server: {result}")
+                else:
                     self.logger.info("MCP server connection closed")
-                except Exception as e:
-                    self.logger.error(f"Failed to disconnect from MCP server: {e}")
             self._server_connections = []
 
             # Unexpose all ports
-            for exposure_id in self._exposure_ids:
-                try:
-                    await self.sandbox_client.unexpose(sandbox_id, exposure_id)
+            results = await asyncio.gather(
+                *[self.sandbox_client.unexpose(sandbox_id, exposure_id) for exposure_id in self._exposure_ids],
+                return_exceptions=True,
+            )
+            for exposure_id, result in zip(self._exposure_ids, results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Failed to unexpose port: {result}")
+                else:
                     self.logger.info(f"Port unexposed: {exposure_id}")
-                except Exception as e:
-                    self.logger.error(f"Failed to unexpose port: {e}")
             self._exposure_ids = []
 
             await self.sandbox_client.delete(sandbox_id)
         return completed
 
+    # Runs after the sandbox teardown handlers, which don't need the pooled client
+    @vf.teardown(priority=-10)
+    async def aclose(self) -> None:
+        """Close the env's pooled HTTP client once all rollouts have finished."""
+        if self._http is not None:
+            http, self._http = self._http, None
+            try:
+                await http.aclose()
+            except Exception as e:
+                # At interpreter exit this runs on a fresh loop, so pooled connections may already be gone
+                self.logger.warning(f"Failed to close the HTTP client: {e}")
+
 
 def load_environment(
     server_config: List[str],
     dataset=None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
     **kwargs,
 ) -> vf.Environment:
     """Load an MCP sandbox environment with one or more MCP servers."""
@@ -237,6 +299,7 @@ def load_environment(
         mcp_server_configs=mcp_server_configs,
         system_prompt=system_prompt,
         message_type="chat",
+        max_in_flight=max_in_flight,
         **kwargs,
     )
     env.remove_tool(env.bash)
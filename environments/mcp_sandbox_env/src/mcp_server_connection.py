@@ -1,40 +1,92 @@
 import asyncio
 import logging
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
 
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.types import TextContent, Tool
 
+# Seconds to let the session close cleanly on disconnect before cancelling it
+DISCONNECT_TIMEOUT = 5.0
+
+DEFAULT_TOOLS_CACHE_TTL = 3600.0
+
+# Upper bound on concurrent tool calls per session; more queue instead of exhausting the HTTP client
+DEFAULT_MAX_IN_FLIGHT = 32
+
+# Tool catalogs keyed by server identity, stored with the time they were listed
+_TOOLS_CACHE: Dict[str, Tuple[float, Dict[str, Tool]]] = {}
+
+
+def _coerce_text(content_item) -> str:
+    """Render a single tool result content item as text."""
+    if hasattr(content_item, "text"):
+        assert isinstance(content_item, TextContent)
+        return content_item.text
+    if hasattr(content_item, "type") and content_item.type == "text":
+        return getattr(content_item, "text", str(content_item))
+    return str(content_item)
+
 
 class MCPServerConnection:
     """HTTP-only MCP connection for sandbox servers."""
 
-    def __init__(self, url: str, headers: Optional[Dict[str, str]], logger: logging.Logger):
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        logger: logging.Logger,
+        cache_key: Optional[str] = None,
+        cache_ttl_seconds: float = DEFAULT_TOOLS_CACHE_TTL,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
         self.url = url
         self.headers = headers or {}
         self.logger = logger
+        # Identifies the server independently of its per-sandbox URL so its tool list can be reused
+        self.cache_key = cache_key
+        self.cache_ttl_seconds = cache_ttl_seconds
         self.session: Optional[ClientSession] = None
         self.tools: Dict[str, Tool] = {}
 
         self._connection_task: Optional[asyncio.Task] = None
         self._ready = asyncio.Event()
+        self._shutdown = asyncio.Event()
         self._error: Optional[Exception] = None
+        self._sem = asyncio.Semaphore(max_in_flight)
         self.loop: Optional[asyncio.AbstractEventLoop] = None
 
+    def _cached_tools(self) -> Optional[Dict[str, Tool]]:
+        if self.cache_key is None or self.cache_key not in _TOOLS_CACHE:
+            return None
+        listed_at, tools = _TOOLS_CACHE[self.cache_key]
+        if time.monotonic() - listed_at > self.cache_ttl_seconds:
+            del _TOOLS_CACHE[self.cache_key]
+            return None
+        return tools
+
     async def connect(self):
-        """Connect to the MCP server via HTTP and retrieve tools."""
+        """Connect to the MCP server via HTTP and retrieve tools.
+
+        If the server's tool list is cached, list_tools is skipped, but the session must still
+        initialize so that a server that never came up fails here rather than on every tool call.
+        """
         self.loop = asyncio.get_running_loop()
-        self._connection_task = asyncio.create_task(self._get_connection())
+        cached_tools = self._cached_tools()
+        self._connection_task = asyncio.create_task(self._get_connection(list_tools=cached_tools is None))
 
         await self._ready.wait()
 
         if self._error:
             raise self._error
 
+        if cached_tools is not None:
+            self.tools = dict(cached_tools)
+            self.logger.debug(f"Using cached tool list for {self.url}")
         return self.tools
 
-    async def _get_connection(self):
+    async def _get_connection(self, list_tools: bool = True):
         try:
             async with streamablehttp_client(
                 self.url,
@@ -45,55 +97,67 @@ class MCPServerConnection:
 
                     await session.initialize()
 
-                    tools_response = await session.list_tools()
+                    if list_tools:
+                        tools_response = await session.list_tools()
+
+                        for tool in tools_response.tools:
+                            self.tools[tool.name] = tool
 
-                    for tool in tools_response.tools:
-                        self.tools[tool.name] = tool
+                        if self.cache_key is not None:
+                            _TOOLS_CACHE[self.cache_key] = (time.monotonic(), dict(self.tools))
 
                     self._ready.set()
 
-                    # Keep connection alive
-                    while True:
-                        await asyncio.sleep(1)
+                    # Keep connection alive until disconnect() is called
+                    await self._shutdown.wait()
 
         except asyncio.CancelledError:
             raise
         except Exception as e:
             self._error = e
+            # The server may have changed or gone away, so relist its tools next time
+            if self.cache_key is not None:
+                _TOOLS_CACHE.pop(self.cache_key, None)
             self._ready.set()
         finally:
             self.session = None
             self.tools = {}
 
+    async def _call(self, tool_name: str, arguments: dict):
+        # Runs on the session's loop, which owns its streams and the in-flight semaphore
+        async with self._sem:
+            assert self.session is not None, "MCP server not connected"
+            return await self.session.call_tool(tool_name, arguments=arguments)
+
     async def call_tool(self, tool_name: str, arguments: dict) -> str:
         """Call a tool on the MCP server."""
+        if self._error:
+            raise self._error
         assert self.session is not None, "MCP server not connected"
         assert self.loop is not None, "Connection loop not initialized"
 
-        fut = asyncio.run_coroutine_threadsafe(self.session.call_tool(tool_name, arguments=arguments), self.loop)
-        result = await asyncio.wrap_future(fut)
+        if asyncio.get_running_loop() is self.loop:
+            result = await self._call(tool_name, arguments)
+        else:
+            fut = asyncio.run_coroutine_threadsafe(self._call(tool_name, arguments), self.loop)
+            result = await asyncio.wrap_future(fut)
 
         if result.content:
-            text_parts = []
-            for content_item in result.content:
-                if hasattr(content_item, "text"):
-                    assert isinstance(content_item, TextContent)
-                    text_parts.append(content_item.text)
-                elif hasattr(content_item, "type") and content_item.type == "text":
-                    text_parts.append(getattr(content_item, "text", str(content_item)))
-                else:
-                    text_parts.append(str(content_item))
-
-            return "\n".join(text_parts)
+            # Tool results are almost always all text, so skip per-item type checks unless one isn't
+            try:
+                return "\n".join(content_item.text for content_item in result.content)
+            except AttributeError:
+                return "\n".join(_coerce_text(content_item) for content_item in result.content)
 
         return "No result returned from tool"
 
     async def disconnect(self):
         """Disconnect from the MCP server."""
         assert self._connection_task is not None
-        self._connection_task.cancel()
+        self._shutdown.set()
         try:
-            await self._connection_task
-        except asyncio.CancelledError:
+            # wait_for cancels the connection task as a fallback if it does not exit in time
+            await asyncio.wait_for(self._connection_task, timeout=DISCONNECT_TIMEOUT)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
             pass
         self.logger.info("MCP server connection terminated")
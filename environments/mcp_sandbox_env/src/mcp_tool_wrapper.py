@@ -16,6 +16,14 @@ class MCPToolWrapper:
         self.__doc__ = tool.description or ""
 
         self.__annotations__ = self._build_annotations()
+        self._oai_tool = {
+            "type": "function",
+            "function": {
+                "name": self.__name__,
+                "description": self.__doc__ or "",
+                "parameters": self.tool.inputSchema or {"type": "object", "properties": {}},
+            },
+        }
 
     def _build_annotations(self) -> dict:
         annotations = {}
@@ -47,11 +55,4 @@ class MCPToolWrapper:
         return await self.server_connection.call_tool(self.tool.name, kwargs)
 
     def to_oai_tool(self) -> dict:
-        return {
-            "type": "function",
-            "function": {
-                "name": self.__name__,
-                "description": self.__doc__ or "",
-                "parameters": self.tool.inputSchema or {"type": "object", "properties": {}},
-            },
-        }
+        return self._oai_tool
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import threading
+import unittest
+from types import SimpleNamespace
+
+from src.mcp_server_connection import MCPServerConnection
+
+
+class _FakeSession:
+    async def call_tool(self, tool_name, arguments):
+        return SimpleNamespace(content=[SimpleNamespace(text=f"{tool_name} ok")])
+
+
+class CallToolFromOtherLoopTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Stands in for the loop the session was opened on, running in its own thread
+        self.session_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.session_loop.run_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            self.session_loop.call_soon_threadsafe(self.session_loop.stop)
+            thread.join()
+            self.session_loop.close()
+
+        self.addCleanup(stop)
+
+        self.connection = MCPServerConnection("http://mcp.invalid/mcp", None, logging.getLogger(__name__), max_in_flight=1)
+        self.connection.session = _FakeSession()
+        self.connection.loop = self.session_loop
+
+    async def test_calls_queue_on_the_session_loop(self):
+        held = threading.Event()
+        release = None
+        local_call = None
+
+        async def occupy_session_loop():
+            # Hold the only slot and queue a call behind it, binding the semaphore to the session loop
+            nonlocal release, local_call
+            release = asyncio.Event()
+            async with self.connection._sem:
+                local_call = asyncio.create_task(self.connection.call_tool("local", {}))
+                await asyncio.sleep(0)
+                held.set()
+                await release.wait()
+            return await local_call
+
+        occupier = asyncio.run_coroutine_threadsafe(occupy_session_loop(), self.session_loop)
+        await asyncio.to_thread(held.wait)
+
+        calls = [asyncio.create_task(self.connection.call_tool(name, {})) for name in ("first", "second")]
+        try:
+            await asyncio.sleep(0.05)
+            self.session_loop.call_soon_threadsafe(release.set)
+            results = await asyncio.wait_for(asyncio.gather(*calls), timeout=5)
+        finally:
+            # Don't leave calls waiting on the session loop once it is stopped
+            for call in calls:
+                call.cancel()
+            await asyncio.gather(*calls, return_exceptions=True)
+
+        self.assertEqual(results, ["first ok", "second ok"])
+        self.assertEqual(await asyncio.wait_for(asyncio.wrap_future(occupier), timeout=5), "local ok")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import asyncio
+import inspect
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+import openai
+import orjson
+from openai import AsyncOpenAI
+
+from examples.browserbase_filtered import rubric
+
+
+def _connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://judge.invalid/v1/chat/completions"))
+
+
+class CallJudgeRetryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        rubric._JUDGE_BREAKER._failures = 0
+        rubric._JUDGE_BREAKER._opened_at = None
+        # Skip the real backoff between attempts
+        patcher = mock.patch("asyncio.sleep", new=mock.AsyncMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sdk_create_is_not_a_coroutine_function(self):
+        client = AsyncOpenAI(api_key="test")
+        self.assertFalse(inspect.iscoroutinefunction(client.chat.completions.create))
+
+    async def test_transient_error_is_retried(self):
+        attempts = 0
+
+        async def _create(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise _connection_error()
+            return "judged"
+
+        # Mirrors the SDK's required_args wrapper: returns a coroutine from a plain function
+        def create(**kwargs):
+            return _create(**kwargs)
+
+        result = await rubric._call_judge(create, model="judge", messages=[])
+
+        self.assertEqual(result, "judged")
+        self.assertEqual(attempts, 3)
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_non_transient_errors_do_not_open_the_breaker(self):
+        breaker = rubric._CircuitBreaker(max_failures=2, reset_seconds=60.0)
+        request = httpx.Request("POST", "https://judge.invalid/v1/chat/completions")
+
+        async def rejected():
+            raise openai.BadRequestError("bad image", response=httpx.Response(400, request=request), body=None)
+
+        for _ in range(3):
+            with self.assertRaises(openai.BadRequestError):
+                await breaker.call(rejected)
+
+        async def ok():
+            return "judged"
+
+        self.assertEqual(await breaker.call(ok), "judged")
+
+    async def test_half_open_lets_a_single_trial_through(self):
+        breaker = rubric._CircuitBreaker(max_failures=1, reset_seconds=0.0)
+
+        async def down():
+            raise _connection_error()
+
+        with self.assertRaises(openai.APIConnectionError):
+            await breaker.call(down)
+
+        trial_started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def trial():
+            trial_started.set()
+            await release.wait()
+            return "judged"
+
+        task = asyncio.create_task(breaker.call(trial))
+        await trial_started.wait()
+        with self.assertRaises(RuntimeError):
+            await breaker.call(trial)
+        release.set()
+        self.assertEqual(await task, "judged")
+
+
+class JudgeSemaphoreTest(unittest.TestCase):
+    def test_usable_from_successive_event_loops(self):
+        async def burst():
+            async def one():
+                async with rubric._judge_semaphore():
+                    await asyncio.sleep(0)
+
+            # More calls than slots, so some have to wait on the semaphore
+            await asyncio.gather(*[one() for _ in range(2 * rubric.MAX_CONCURRENT_JUDGE_CALLS)])
+
+        asyncio.run(burst())
+        asyncio.run(burst())
+
+
+class _FakeBatchClient:
+    """Stands in for the files and batches APIs, completing the batch with the given output rows."""
+
+    def __init__(self, rows):
+        output = "\n".join(orjson.dumps(row).decode() for row in rows)
+        batch = SimpleNamespace(id="batch-1", status="completed", output_file_id="out-1", error_file_id=None)
+        self.deleted = []
+
+        async def create_file(**kwargs):
+            return SimpleNamespace(id="in-1")
+
+        async def content(file_id):
+            return SimpleNamespace(text=output)
+
+        async def delete(file_id):
+            self.deleted.append(file_id)
+
+        async def create_batch(**kwargs):
+            return batch
+
+        self.files = SimpleNamespace(create=create_file, content=content, delete=delete)
+        self.batches = SimpleNamespace(create=create_batch)
+
+
+def _batch_row(custom_id, content='{"key_points": ["a"]}', status_code=200, finish_reason="stop", error=None):
+    choice = {"finish_reason": finish_reason, "message": {"content": content}}
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": status_code, "body": {"choices": [choice]}},
+        "error": error,
+    }
+
+
+class BatchParseTest(unittest.IsolatedAsyncioTestCase):
+    async def parse(self, *rows):
+        requests = {row["custom_id"]: [] for row in rows}
+        client = _FakeBatchClient(rows)
+        try:
+            return await rubric._batch_parse(client, "judge", requests, rubric.KeyPointsIdentification)
+        finally:
+            self.assertEqual(sorted(client.deleted), ["in-1", "out-1"])
+
+    async def test_parses_completed_rows(self):
+        results = await self.parse(_batch_row("task-step1"))
+        self.assertEqual(results["task-step1"].key_points, ["a"])
+
+    async def test_failed_row_names_its_custom_id(self):
+        for row in (
+            _batch_row("task-step1", status_code=429),
+            _batch_row("task-step1", error={"code": "server_error", "message": "boom"}),
+            _batch_row("task-step1", content='{"key_po', finish_reason="length"),
+        ):
+            with self.subTest(row=row), self.assertRaisesRegex(RuntimeError, "task-step1"):
+                await self.parse(_batch_row("other-step1"), row)
+
+
+if __name__ == "__main__":
+    unittest.main()